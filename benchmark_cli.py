@@ -3,7 +3,7 @@ import json
 import os
 import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import jsonlines
 import numpy as np
@@ -13,6 +13,11 @@ from ranx import Qrels, Run, evaluate
 from sklearn.metrics.pairwise import cosine_similarity
 from tqdm import tqdm
 
+from dedup import deduplicate
+from local_inference import LocalEmbeddingModel
+from results_store import ResultsStore
+from serving_simulation import Reranker, ServingSimulator
+
 
 @dataclass
 class EmbeddingModel:
@@ -22,6 +27,31 @@ class EmbeddingModel:
     batch_size: int = 2
     max_length: int = 8192
 
+    def embed_batch(self, batch: List[str]) -> Tuple[Optional[List[List[float]]], float]:
+        """Send a single request for ``batch``, without any rate limiting."""
+        start_time = time.time()
+        response = requests.post(
+            self.endpoint,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={
+                "input": batch,
+                "model": self.name,
+                "truncate_prompt_tokens": self.max_length,
+                # "extra_body": {
+                #     "truncate_prompt_tokens": self.max_length,
+                # }
+            },
+        )
+        batch_time = time.time() - start_time
+
+        if response.status_code != 200:
+            # raise Exception(f"API call failed: {response.text}")
+            print(f"API call failed for batch: {response}")
+            return None, batch_time
+
+        data = response.json()["data"]
+        return [item["embedding"] for item in data], batch_time
+
     def get_embeddings(self, texts: List[str]) -> Tuple[np.ndarray, float]:
         all_embeddings = []
         total_time = 0.0
@@ -33,37 +63,19 @@ class EmbeddingModel:
             batch = texts[i : i + self.batch_size]
 
             try:
-                start_time = time.time()
-                response = requests.post(
-                    self.endpoint,
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    json={
-                        "input": batch,
-                        "model": self.name,
-                        "truncate_prompt_tokens": self.max_length,
-                        # "extra_body": {
-                        #     "truncate_prompt_tokens": self.max_length,
-                        # }
-                    },
-                )
-                batch_time = time.time() - start_time
-
-                if response.status_code != 200:
-                    # raise Exception(f"API call failed: {response.text}")
-                    print(f"API call failed for batch {i}: {response}")
-                    continue
-
-                data = response.json()["data"]
-                embeddings = [item["embedding"] for item in data]
-                all_embeddings.extend(embeddings)
-                total_time += batch_time
-
-                time.sleep(5)
-
+                embeddings, batch_time = self.embed_batch(batch)
             except Exception as e:
                 print(f"Error processing batch {i}: {str(e)}")
                 return np.array([]), total_time
 
+            if embeddings is None:
+                continue
+
+            all_embeddings.extend(embeddings)
+            total_time += batch_time
+
+            time.sleep(5)
+
         return np.array(all_embeddings), total_time
 
 
@@ -126,31 +138,76 @@ class SingleModelBenchmarker:
         dataset: BEIRDataset,
         embedding_model: EmbeddingModel,
         top_k: int = 100,
+        dedup: str = "none",
+        dedup_threshold: float = 0.9,
     ):
         self.dataset = dataset
         self.embedding_model = embedding_model
         self.top_k = top_k
+        self.dedup = dedup
+        self.dedup_threshold = dedup_threshold
 
-    def run_benchmark(self, split: str = "test") -> Dict:
-        results = {}
-        timing_stats = {}
-
+    def _embed_corpus(self) -> Tuple[List[str], List[str], np.ndarray, float, Dict]:
         print(f"\nProcessing embeddings for model: {self.embedding_model.name}")
 
         # Get document embeddings
         doc_texts = [doc["text"] for doc in self.dataset.corpus.values()]
         doc_ids = list(self.dataset.corpus.keys())
 
-        doc_embeddings, embed_time = self.embedding_model.get_embeddings(doc_texts)
+        dedup_result = None
+        dedup_stats = {}
+        texts_to_embed = doc_texts
+        if self.dedup != "none":
+            start_time = time.time()
+            dedup_result = deduplicate(doc_texts, mode=self.dedup, threshold=self.dedup_threshold)
+            dedup_time = time.time() - start_time
+            texts_to_embed = [doc_texts[i] for i in dedup_result.representatives]
+            print(
+                f"Deduplicated corpus: {dedup_result.num_unique} unique of "
+                f"{dedup_result.num_texts} documents"
+            )
+
+        doc_embeddings, embed_time = self.embedding_model.get_embeddings(texts_to_embed)
 
         if len(doc_embeddings) == 0:
             print(f"Failed to get document embeddings for {self.embedding_model.name}")
-            return {"metrics": {}, "timing": {}}
+            return doc_ids, doc_texts, doc_embeddings, embed_time, dedup_stats
+
+        if dedup_result is not None:
+            if len(doc_embeddings) != dedup_result.num_unique:
+                print(f"Got {len(doc_embeddings)} embeddings for {dedup_result.num_unique} unique documents")
+                return doc_ids, doc_texts, np.array([]), embed_time, dedup_stats
+
+            # Estimate what embedding the duplicates would have cost at the observed rate
+            saved_texts = dedup_result.num_texts - dedup_result.num_unique
+            dedup_stats = {
+                "mode": self.dedup,
+                "threshold": self.dedup_threshold,
+                "num_documents": dedup_result.num_texts,
+                "num_unique": dedup_result.num_unique,
+                "exact_duplicates": dedup_result.exact_duplicates,
+                "near_duplicates": dedup_result.near_duplicates,
+                "dedup_ratio": dedup_result.dedup_ratio,
+                "texts_saved": saved_texts,
+                "dedup_time": dedup_time,
+                "estimated_embedding_time_saved": embed_time / dedup_result.num_unique * saved_texts,
+            }
+            doc_embeddings = dedup_result.fan_out(doc_embeddings)
 
         # Ensure embeddings are 2D
         if len(doc_embeddings.shape) == 3:
             doc_embeddings = doc_embeddings.reshape(doc_embeddings.shape[0], -1)
 
+        return doc_ids, doc_texts, doc_embeddings, embed_time, dedup_stats
+
+    def run_benchmark(self, split: str = "test") -> Dict:
+        results = {}
+        timing_stats = {}
+
+        doc_ids, _, doc_embeddings, embed_time, dedup_stats = self._embed_corpus()
+        if len(doc_embeddings) == 0:
+            return {"metrics": {}, "timing": {}}
+
         timing_stats[f"{self.embedding_model.name}_embedding_time"] = embed_time
 
         # Process each query
@@ -185,7 +242,65 @@ class SingleModelBenchmarker:
 
         # Evaluate results
         metrics = self._evaluate_results(results, split)
-        return {"metrics": metrics, "timing": timing_stats}
+        results = {"metrics": metrics, "timing": timing_stats}
+        if dedup_stats:
+            results["dedup"] = dedup_stats
+        return results
+
+    def run_serving_simulation(
+        self,
+        split: str = "test",
+        arrival_rates: Sequence[float] = (1.0,),
+        arrival_process: str = "poisson",
+        num_queries: int = 200,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        reranker: Optional[Reranker] = None,
+        seed: int = 0,
+    ) -> Dict:
+        """Replay the split's queries at each arrival rate and report latency."""
+        timing_stats = {}
+
+        doc_ids, doc_texts, doc_embeddings, embed_time, dedup_stats = self._embed_corpus()
+        if len(doc_embeddings) == 0:
+            return {"serving": [], "timing": {}}
+
+        timing_stats[f"{self.embedding_model.name}_embedding_time"] = embed_time
+
+        split_queries = [
+            (query_id, query_text)
+            for query_id, query_text in self.dataset.queries.items()
+            if query_id in self.dataset.qrels[split]
+        ]
+        if not split_queries:
+            print(f"No queries with qrels in split {split}")
+            return {"serving": [], "timing": timing_stats}
+
+        # Cycle through the split so each rate sees the same number of requests
+        replay = [split_queries[i % len(split_queries)] for i in range(num_queries)]
+
+        simulator = ServingSimulator(
+            embedding_model=self.embedding_model,
+            doc_ids=doc_ids,
+            doc_texts=doc_texts,
+            doc_embeddings=doc_embeddings,
+            top_k=self.top_k,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            reranker=reranker,
+        )
+
+        serving_stats = []
+        for rate in arrival_rates:
+            print(f"Simulating {arrival_process} arrivals at {rate} queries/s")
+            serving_stats.append(
+                simulator.simulate(replay, rate, process=arrival_process, seed=seed)
+            )
+
+        results = {"serving": serving_stats, "timing": timing_stats}
+        if dedup_stats:
+            results["dedup"] = dedup_stats
+        return results
 
     def _evaluate_results(self, results: Dict, split: str) -> Dict:
         metrics = {}
@@ -230,11 +345,54 @@ def parse_arguments():
         help="Name of the embedding model (e.g., 'BAAI/bge-m3')"
     )
 
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="http",
+        choices=["http", "transformers", "hashing"],
+        help="Embedding backend: remote HTTP endpoint, local transformers model, "
+        "or deterministic hashing embedder (default: 'http')"
+    )
+
     parser.add_argument(
         "--endpoint",
         type=str,
-        required=True,
-        help="API endpoint for the model (e.g., 'http://localhost:5506/v1/embeddings')"
+        help="API endpoint for the model, required for the http backend "
+        "(e.g., 'http://localhost:5506/v1/embeddings')"
+    )
+
+    parser.add_argument(
+        "--model-path",
+        type=str,
+        help="Local model directory for the transformers backend"
+    )
+
+    parser.add_argument(
+        "--pooling",
+        type=str,
+        default="mean",
+        choices=["mean", "cls", "last"],
+        help="Pooling for the transformers backend (default: 'mean')"
+    )
+
+    parser.add_argument(
+        "--embedding-dim",
+        type=int,
+        default=768,
+        help="Embedding size for the hashing backend (default: 768)"
+    )
+
+    parser.add_argument(
+        "--num-threads",
+        type=int,
+        default=1,
+        help="Worker threads for local backends (default: 1)"
+    )
+
+    parser.add_argument(
+        "--max-batch-tokens",
+        type=int,
+        help="Padded token budget per batch for local backends (default: no limit)"
     )
 
     parser.add_argument(
@@ -279,6 +437,19 @@ def parse_arguments():
         help="Output file for results (default: benchmark_results_{model_name_safe}.json)"
     )
 
+    parser.add_argument(
+        "--results-db",
+        type=str,
+        default=os.path.join("results", "results.db"),
+        help="SQLite results store that each run is appended to (default: 'results/results.db')"
+    )
+
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Do not append this run to the results store"
+    )
+
     parser.add_argument(
         "--api-key",
         type=str,
@@ -286,6 +457,89 @@ def parse_arguments():
         help="API key for the model endpoint (default: 'dummy')"
     )
 
+    parser.add_argument(
+        "--dedup",
+        type=str,
+        default="none",
+        choices=["none", "exact", "near"],
+        help="Embed each unique corpus text once: exact hash or MinHash/LSH near-duplicates (default: 'none')"
+    )
+
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.9,
+        help="Jaccard similarity threshold for --dedup near (default: 0.9)"
+    )
+
+    parser.add_argument(
+        "--simulate-serving",
+        action="store_true",
+        help="Replay queries at a fixed arrival rate and report per-query latency"
+    )
+
+    parser.add_argument(
+        "--arrival-rates",
+        type=str,
+        default="1",
+        help="Comma-separated arrival rates in queries/s for --simulate-serving (default: '1')"
+    )
+
+    parser.add_argument(
+        "--arrival-process",
+        type=str,
+        default="poisson",
+        choices=["poisson", "constant"],
+        help="Inter-arrival distribution for --simulate-serving (default: 'poisson')"
+    )
+
+    parser.add_argument(
+        "--num-queries",
+        type=int,
+        default=200,
+        help="Number of queries replayed per arrival rate (default: 200)"
+    )
+
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=8,
+        help="Maximum micro-batch size for the serving scheduler (default: 8)"
+    )
+
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=10.0,
+        help="Maximum time a query waits for its micro-batch to fill (default: 10)"
+    )
+
+    parser.add_argument(
+        "--rerank-model",
+        type=str,
+        help="Optional reranker model applied during --simulate-serving"
+    )
+
+    parser.add_argument(
+        "--rerank-endpoint",
+        type=str,
+        help="Rerank API endpoint (e.g., 'http://localhost:5507/v1/rerank')"
+    )
+
+    parser.add_argument(
+        "--rerank-top-n",
+        type=int,
+        default=20,
+        help="Number of first-stage results passed to the reranker (default: 20)"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for Poisson arrivals (default: 0)"
+    )
+
     parser.add_argument(
         "--quiet",
         action="store_true",
@@ -295,6 +549,127 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def print_dedup_summary(results: Dict):
+    if "dedup" not in results:
+        return
+
+    stats = results["dedup"]
+    print(f"\nDeduplication ({stats['mode']}):")
+    print(f"  unique documents: {stats['num_unique']} / {stats['num_documents']}")
+    print(f"  exact duplicates: {stats['exact_duplicates']}")
+    print(f"  near duplicates: {stats['near_duplicates']}")
+    print(f"  dedup ratio: {stats['dedup_ratio']:.2%}")
+    print(f"  embedding calls saved: {stats['texts_saved']} texts")
+    print(f"  estimated embedding time saved: {stats['estimated_embedding_time_saved']:.2f}s")
+
+
+def run_config(args) -> Dict:
+    """Settings that affect benchmark results, hashed to group comparable runs."""
+    return {
+        "model_name": args.model_name,
+        "backend": args.backend,
+        "model_path": args.model_path,
+        "pooling": args.pooling if args.backend == "transformers" else None,
+        "embedding_dim": args.embedding_dim if args.backend == "hashing" else None,
+        "max_length": args.max_length,
+        "batch_size": args.batch_size,
+        "top_k": args.top_k,
+        "dedup": args.dedup,
+        "dedup_threshold": args.dedup_threshold if args.dedup == "near" else None,
+    }
+
+
+def run_serving_mode(args, benchmarker: SingleModelBenchmarker) -> int:
+    try:
+        arrival_rates = [float(rate) for rate in args.arrival_rates.split(",")]
+    except ValueError:
+        print(f"Error: Invalid --arrival-rates: {args.arrival_rates}")
+        return 1
+
+    if any(rate <= 0 for rate in arrival_rates):
+        print(f"Error: --arrival-rates must all be positive, got {args.arrival_rates}")
+        return 1
+
+    if args.num_queries <= 0:
+        print(f"Error: --num-queries must be positive, got {args.num_queries}")
+        return 1
+
+    if args.max_batch_size <= 0:
+        print(f"Error: --max-batch-size must be positive, got {args.max_batch_size}")
+        return 1
+
+    if args.max_wait_ms < 0:
+        print(f"Error: --max-wait-ms must not be negative, got {args.max_wait_ms}")
+        return 1
+
+    if args.rerank_top_n <= 0:
+        print(f"Error: --rerank-top-n must be positive, got {args.rerank_top_n}")
+        return 1
+
+    reranker = None
+    if args.rerank_model or args.rerank_endpoint:
+        if not (args.rerank_model and args.rerank_endpoint):
+            print("Error: --rerank-model and --rerank-endpoint must be given together")
+            return 1
+        reranker = Reranker(
+            name=args.rerank_model,
+            endpoint=args.rerank_endpoint,
+            api_key=args.api_key,
+            top_n=args.rerank_top_n,
+        )
+
+    if not args.quiet:
+        print(f"Starting serving simulation for {args.model_name} on {args.split} split...")
+
+    try:
+        results = benchmarker.run_serving_simulation(
+            split=args.split,
+            arrival_rates=arrival_rates,
+            arrival_process=args.arrival_process,
+            num_queries=args.num_queries,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+            reranker=reranker,
+            seed=args.seed,
+        )
+    except Exception as e:
+        print(f"Error running serving simulation: {str(e)}")
+        return 1
+
+    if args.output_file:
+        output_file = args.output_file
+    else:
+        model_name_safe = args.model_name.replace("/", "_").replace("-", "_")
+        output_file = f"serving_results_{model_name_safe}.json"
+
+    try:
+        with open(output_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+        if not args.quiet:
+            print(f"Results saved to: {output_file}")
+    except Exception as e:
+        print(f"Error saving results: {str(e)}")
+        return 1
+
+    if not args.quiet:
+        print("\nServing Results (latency in ms):")
+        print(f"  {'rate':>8} {'qps':>8} {'batch':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for stats in results["serving"]:
+            print(
+                f"  {stats['arrival_rate']:>8.2f}"
+                f" {stats['throughput_qps']:>8.2f}"
+                f" {stats['mean_batch_size']:>6.2f}"
+                f" {stats.get('latency_p50_ms', float('nan')):>9.2f}"
+                f" {stats.get('latency_p95_ms', float('nan')):>9.2f}"
+                f" {stats.get('latency_p99_ms', float('nan')):>9.2f}"
+            )
+
+        print_dedup_summary(results)
+
+    return 0
+
+
 def main():
     args = parse_arguments()
 
@@ -312,44 +687,73 @@ def main():
         print(f"Dataset loaded: {len(dataset.queries)} queries, {len(dataset.corpus)} documents")
 
     # Create embedding model
-    embedding_model = EmbeddingModel(
-        name=args.model_name,
-        endpoint=args.endpoint,
-        api_key=args.api_key,
-        batch_size=args.batch_size,
-        max_length=args.max_length
-    )
-
-    if not args.quiet:
-        print(f"Testing model endpoint: {args.endpoint}")
+    if args.backend == "http":
+        if not args.endpoint:
+            print("Error: --endpoint is required for the http backend")
+            return 1
 
-    # Test the endpoint
-    try:
-        response = requests.post(
-            args.endpoint,
-            headers={"Authorization": f"Bearer {args.api_key}"},
-            json={
-                "input": ["test"],
-                "model": args.model_name,
-            },
-            timeout=30
+        embedding_model = EmbeddingModel(
+            name=args.model_name,
+            endpoint=args.endpoint,
+            api_key=args.api_key,
+            batch_size=args.batch_size,
+            max_length=args.max_length
         )
-        if response.status_code != 200:
-            print(f"Error: Model endpoint test failed: {response.text}")
+
+        if not args.quiet:
+            print(f"Testing model endpoint: {args.endpoint}")
+
+        # Test the endpoint
+        try:
+            response = requests.post(
+                args.endpoint,
+                headers={"Authorization": f"Bearer {args.api_key}"},
+                json={
+                    "input": ["test"],
+                    "model": args.model_name,
+                },
+                timeout=30
+            )
+            if response.status_code != 200:
+                print(f"Error: Model endpoint test failed: {response.text}")
+                return 1
+            if not args.quiet:
+                print("Model endpoint is responding correctly")
+        except Exception as e:
+            print(f"Error: Cannot connect to model endpoint: {str(e)}")
             return 1
+    else:
         if not args.quiet:
-            print("Model endpoint is responding correctly")
-    except Exception as e:
-        print(f"Error: Cannot connect to model endpoint: {str(e)}")
-        return 1
+            print(f"Loading local {args.backend} backend for {args.model_name}")
+
+        try:
+            embedding_model = LocalEmbeddingModel(
+                name=args.model_name,
+                backend=args.backend,
+                model_path=args.model_path,
+                batch_size=args.batch_size,
+                max_length=args.max_length,
+                num_threads=args.num_threads,
+                embedding_dim=args.embedding_dim,
+                pooling=args.pooling,
+                max_batch_tokens=args.max_batch_tokens,
+            )
+        except Exception as e:
+            print(f"Error: Cannot load local model: {str(e)}")
+            return 1
 
     # Run benchmark
     benchmarker = SingleModelBenchmarker(
         dataset=dataset,
         embedding_model=embedding_model,
         top_k=args.top_k,
+        dedup=args.dedup,
+        dedup_threshold=args.dedup_threshold,
     )
 
+    if args.simulate_serving:
+        return run_serving_mode(args, benchmarker)
+
     if not args.quiet:
         print(f"Starting benchmark for {args.model_name} on {args.split} split...")
 
@@ -377,6 +781,25 @@ def main():
         print(f"Error saving results: {str(e)}")
         return 1
 
+    # Append to the results store
+    if not args.no_store:
+        try:
+            with ResultsStore(args.results_db) as store:
+                run_id = store.add_run(
+                    results,
+                    model=args.model_name,
+                    dataset=os.path.normpath(args.dataset_path),
+                    split=args.split,
+                    config=run_config(args),
+                    source=output_file,
+                )
+
+            if not args.quiet:
+                print(f"Run {run_id} appended to: {args.results_db}")
+        except Exception as e:
+            print(f"Error storing results: {str(e)}")
+            return 1
+
     # Print results summary
     if not args.quiet:
         print("\nMetrics Results:")
@@ -392,6 +815,8 @@ def main():
         for timing_key, time_value in results["timing"].items():
             print(f"  {timing_key}: {time_value:.2f}s")
 
+        print_dedup_summary(results)
+
     # Print summary line for bash script parsing
     if results["metrics"] and args.model_name in results["metrics"]:
         metrics = results["metrics"][args.model_name]
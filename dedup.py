@@ -0,0 +1,173 @@
+import hashlib
+import itertools
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def _hash32(value: str) -> int:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little")
+
+
+class MinHashLSH:
+    """MinHash signatures over word shingles, bucketed with banded LSH."""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        shingle_size: int = 3,
+        seed: int = 0,
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = self._optimal_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+
+    @staticmethod
+    def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+        # The LSH S-curve crosses 0.5 near (1 / bands) ** (1 / rows)
+        candidates = [
+            (bands, num_perm // bands)
+            for bands in range(1, num_perm + 1)
+            if num_perm % bands == 0
+        ]
+        return min(
+            candidates,
+            key=lambda br: abs((1.0 / br[0]) ** (1.0 / br[1]) - threshold),
+        )
+
+    def shingles(self, text: str) -> List[str]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) <= self.shingle_size:
+            return [" ".join(tokens)]
+        return [
+            " ".join(tokens[i : i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        ]
+
+    def signature(self, shingles: Set[str]) -> np.ndarray:
+        hashes = np.array(
+            [_hash32(shingle) % MERSENNE_PRIME for shingle in shingles],
+            dtype=np.int64,
+        )
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def candidate_pairs(self, signatures: np.ndarray) -> List[Tuple[int, int]]:
+        pairs = set()
+        for band in range(self.bands):
+            buckets: Dict[bytes, List[int]] = {}
+            rows = signatures[:, band * self.rows : (band + 1) * self.rows]
+            for index, row in enumerate(rows):
+                buckets.setdefault(row.tobytes(), []).append(index)
+            for members in buckets.values():
+                pairs.update(itertools.combinations(members, 2))
+        return sorted(pairs)
+
+
+@dataclass
+class DedupResult:
+    """Mapping from every input text to the unique text that represents it."""
+
+    representatives: List[int]
+    assignment: List[int]
+    exact_duplicates: int
+    near_duplicates: int
+
+    @property
+    def num_texts(self) -> int:
+        return len(self.assignment)
+
+    @property
+    def num_unique(self) -> int:
+        return len(self.representatives)
+
+    @property
+    def dedup_ratio(self) -> float:
+        if not self.assignment:
+            return 0.0
+        return 1.0 - self.num_unique / self.num_texts
+
+    def fan_out(self, unique_embeddings: np.ndarray) -> np.ndarray:
+        """Expand embeddings of the representatives back to one row per input text."""
+        return unique_embeddings[np.array(self.assignment)]
+
+
+def deduplicate(
+    texts: List[str],
+    mode: str = "exact",
+    threshold: float = 0.9,
+    num_perm: int = 128,
+    shingle_size: int = 3,
+    seed: int = 0,
+) -> DedupResult:
+    """Group identical (``exact``) or also near-identical (``near``) texts."""
+    if mode not in ("exact", "near"):
+        raise ValueError(f"Unknown dedup mode: {mode}")
+
+    # Every text points at the index of the text whose embedding it will reuse
+    representative_of = list(range(len(texts)))
+
+    # Exact duplicates: embedding models are case and whitespace sensitive, so
+    # only surrounding whitespace is ignored; looser matching is left to ``near``
+    first_seen: Dict[str, int] = {}
+    exact_duplicates = 0
+    for index, text in enumerate(texts):
+        key = hashlib.sha1(text.strip().encode("utf-8")).hexdigest()
+        if key in first_seen:
+            representative_of[index] = first_seen[key]
+            exact_duplicates += 1
+        else:
+            first_seen[key] = index
+
+    near_duplicates = 0
+    if mode == "near" and len(first_seen) > 1:
+        lsh = MinHashLSH(threshold, num_perm, shingle_size, seed)
+        unique_indices = sorted(first_seen.values())
+        shingle_sets = [set(lsh.shingles(texts[i])) for i in unique_indices]
+        signatures = np.stack([lsh.signature(shingles) for shingles in shingle_sets])
+
+        earlier_candidates: Dict[int, List[int]] = {}
+        for a, b in lsh.candidate_pairs(signatures):
+            earlier_candidates.setdefault(b, []).append(a)
+
+        # Greedy clustering: each text joins the most similar existing
+        # representative among its LSH candidates, confirmed with the exact
+        # Jaccard similarity. Groups never chain through non-representatives.
+        cluster_of = list(range(len(unique_indices)))
+        for b in range(len(unique_indices)):
+            best, best_similarity = None, threshold
+            for rep in {cluster_of[a] for a in earlier_candidates.get(b, [])}:
+                union = len(shingle_sets[b] | shingle_sets[rep])
+                similarity = len(shingle_sets[b] & shingle_sets[rep]) / union if union else 1.0
+                if similarity >= best_similarity:
+                    best, best_similarity = rep, similarity
+            if best is not None:
+                cluster_of[b] = best
+                near_duplicates += 1
+
+        for position, index in enumerate(unique_indices):
+            representative_of[index] = unique_indices[cluster_of[position]]
+
+    # Exact duplicates follow their first occurrence into its near-duplicate group
+    roots = [representative_of[representative_of[index]] for index in range(len(texts))]
+    representatives = sorted(set(roots))
+    position = {root: i for i, root in enumerate(representatives)}
+
+    return DedupResult(
+        representatives=representatives,
+        assignment=[position[root] for root in roots],
+        exact_duplicates=exact_duplicates,
+        near_duplicates=near_duplicates,
+    )
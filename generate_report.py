@@ -1,60 +1,51 @@
-import json
-import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt
 
+from results_store import ResultsStore
+
+RESULTS_DB = "results.db"
+TREND_METRIC = "ndcg@10"
+
 def load_benchmark_results(results_dir):
-    """Load all benchmark results from JSON files in the specified directory."""
-    results = {}
-    results_path = Path(results_dir)
-
-    for json_file in results_path.glob("benchmark_results_*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-            # Get model name from the first key in metrics
-            model_name = list(data["metrics"].keys())[0]
-            results[model_name] = {
-                "metrics": data["metrics"][model_name],
-                "timing": data["timing"].get(f"{model_name}_embedding_time", None)
-            }
-
-    return results
-
-def create_metrics_table(results):
-    """Create a DataFrame comparing metrics across models."""
-    metrics_data = []
-
-    for model, data in results.items():
-        metrics = data["metrics"]
-        metrics["model"] = model
-        metrics_data.append(metrics)
-
-    df = pd.DataFrame(metrics_data)
-    # Set model as index and format float values
-    df.set_index("model", inplace=True)
+    """Open the results store, importing any new or changed JSON result files."""
+    store = ResultsStore(str(Path(results_dir) / RESULTS_DB))
+    ingested = store.ingest_json_dir(results_dir)
+    if ingested:
+        print(f"Imported {ingested} new result file(s) into {store.db_path}")
+    return store
+
+def create_metrics_table(store):
+    """Create a DataFrame comparing the latest metrics across models and rerankers."""
+    df = store.latest_metrics()
     float_cols = df.select_dtypes(include=['float64']).columns
     df[float_cols] = df[float_cols].round(4)
 
     return df
 
-def create_timing_table(results):
-    """Create a DataFrame comparing embedding times across models."""
-    timing_data = {
-        model: {"embedding_time": data["timing"]}
-        for model, data in results.items()
-    }
-
-    df = pd.DataFrame.from_dict(timing_data, orient="index")
+def create_timing_table(store):
+    """Create a DataFrame comparing the latest embedding and rerank times."""
+    df = store.latest_timings()
     df = df.round(2)
 
     return df
 
+def create_trend_table(store, metric=TREND_METRIC):
+    """Create a DataFrame with the history of a metric, one column per model."""
+    return store.metric_trend(metric).round(4)
+
 def plot_metrics(metrics_df, output_dir):
     """Generate plots for each metric."""
     metrics = metrics_df.columns
     for metric in metrics:
         plt.figure(figsize=(10, 6))
-        metrics_df[metric].plot(kind='bar')
+        series = metrics_df[metric]
+        if series.index.nlevels > 1:
+            # "model [dataset/split/config]" labels, leaving out empty levels from legacy imports
+            series.index = [
+                f"{model} [{'/'.join(part for part in rest if part)}]" if any(rest) else model
+                for model, *rest in series.index
+            ]
+        series.plot(kind='bar')
         plt.title(f"{metric} Comparison Across Models")
         plt.xlabel("Model")
         plt.ylabel(metric)
@@ -65,13 +56,17 @@ def plot_metrics(metrics_df, output_dir):
 
 def generate_report():
     results_dir = "results"
-    results = load_benchmark_results(results_dir)
+    store = load_benchmark_results(results_dir)
 
     # Create metrics comparison table
-    metrics_df = create_metrics_table(results)
+    metrics_df = create_metrics_table(store)
 
     # Create timing comparison table
-    timing_df = create_timing_table(results)
+    timing_df = create_timing_table(store)
+
+    # Create historical trend table
+    trend_df = create_trend_table(store)
+    store.close()
 
     # Generate plots
     plot_metrics(metrics_df, results_dir)
@@ -83,17 +78,23 @@ def generate_report():
     print("-" * 80)
     print(metrics_df.to_string())
 
-    print("\n\nEmbedding Time Comparison (seconds):")
+    print("\n\nTiming Comparison (seconds):")
     print("-" * 80)
     print(timing_df.to_string())
 
+    print(f"\n\n{TREND_METRIC} History:")
+    print("-" * 80)
+    print(trend_df.tail(10).to_string())
+
     # Save tables to CSV
     metrics_df.to_csv(Path(results_dir) / "metrics_comparison.csv")
     timing_df.to_csv(Path(results_dir) / "timing_comparison.csv")
+    trend_df.to_csv(Path(results_dir) / f"{TREND_METRIC.replace('@', '_at_')}_trend.csv")
 
     print("\nReport files have been saved to the results directory:")
     print("- metrics_comparison.csv")
     print("- timing_comparison.csv")
+    print(f"- {TREND_METRIC.replace('@', '_at_')}_trend.csv")
     print("- Metric comparison plots (PNG files)")
 
 if __name__ == "__main__":
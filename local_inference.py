@@ -0,0 +1,205 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+COUNT_CHUNK_SIZE = 256
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder, for tests and network-free runs.
+
+    Word unigrams and bigrams are hashed into ``dim`` buckets with a signed
+    hash, then L2-normalised. No model weights are needed.
+    """
+
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+
+    def tokenize(self, text: str) -> List[str]:
+        return TOKEN_PATTERN.findall(text.lower())
+
+    def count_tokens(self, texts: List[str], max_length: int) -> List[int]:
+        return [min(len(self.tokenize(text)), max_length) for text in texts]
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        sign = 1.0 if value & 1 else -1.0
+        return (value >> 1) % self.dim, sign
+
+    def encode(self, texts: List[str], max_length: int) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = self.tokenize(text)[:max_length]
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                index, sign = self._bucket(feature)
+                embeddings[row, index] += sign
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+
+class TransformersEmbedder:
+    """Embed texts with a Hugging Face model loaded from a local directory."""
+
+    def __init__(self, model_path: str, pooling: str = "mean", num_threads: int = 1):
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The transformers backend requires 'torch' and 'transformers' to be installed"
+            ) from e
+
+        if pooling not in ("mean", "cls", "last"):
+            raise ValueError(f"Unknown pooling: {pooling}")
+
+        self.torch = torch
+        self.pooling = pooling
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        self.model = AutoModel.from_pretrained(model_path, local_files_only=True)
+        self.model.eval()
+        # Fast tokenizers are not safe to call from several threads at once
+        self._tokenizer_lock = threading.Lock()
+
+        # Split the cores between the worker threads instead of oversubscribing
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // max(1, num_threads)))
+
+    def count_tokens(self, texts: List[str], max_length: int) -> List[int]:
+        lengths = []
+        # Count in chunks so the lock is released between them and memory stays bounded
+        for i in range(0, len(texts), COUNT_CHUNK_SIZE):
+            with self._tokenizer_lock:
+                encoded = self.tokenizer(
+                    texts[i : i + COUNT_CHUNK_SIZE],
+                    add_special_tokens=True,
+                    truncation=True,
+                    max_length=max_length,
+                )
+            lengths.extend(len(ids) for ids in encoded["input_ids"])
+        return lengths
+
+    def encode(self, texts: List[str], max_length: int) -> np.ndarray:
+        torch = self.torch
+        with self._tokenizer_lock:
+            inputs = self.tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors="pt",
+            )
+        with torch.inference_mode():
+            hidden = self.model(**inputs).last_hidden_state
+
+        mask = inputs["attention_mask"]
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        elif self.pooling == "last":
+            if self.tokenizer.padding_side == "left":
+                pooled = hidden[:, -1]
+            else:
+                last = mask.sum(dim=1) - 1
+                pooled = hidden[torch.arange(hidden.shape[0]), last]
+        else:
+            weights = mask.unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * weights).sum(dim=1) / weights.sum(dim=1).clamp(min=1e-9)
+
+        pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+        return pooled.float().cpu().numpy()
+
+
+def length_bucketed_batches(
+    lengths: List[int], batch_size: int, max_batch_tokens: Optional[int] = None
+) -> List[List[int]]:
+    """Group text indices into batches of similar token length.
+
+    Indices are sorted by length so each batch pads to a near-uniform size.
+    A batch is closed when it reaches ``batch_size`` texts or, if
+    ``max_batch_tokens`` is set, when its padded size would exceed it.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batches = []
+    current: List[int] = []
+    for index in order:
+        if current:
+            padded = (len(current) + 1) * max(lengths[index], 1)
+            full = len(current) >= batch_size
+            too_large = max_batch_tokens is not None and padded > max_batch_tokens
+            if full or too_large:
+                batches.append(current)
+                current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
+
+
+@dataclass
+class LocalEmbeddingModel:
+    """In-process drop-in for ``EmbeddingModel`` that needs no embedding server."""
+
+    name: str
+    backend: str = "hashing"
+    model_path: Optional[str] = None
+    batch_size: int = 32
+    max_length: int = 8192
+    num_threads: int = 1
+    embedding_dim: int = 768
+    pooling: str = "mean"
+    max_batch_tokens: Optional[int] = None
+    _embedder: object = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.backend == "hashing":
+            self._embedder = HashingEmbedder(dim=self.embedding_dim)
+        elif self.backend == "transformers":
+            if not self.model_path:
+                raise ValueError("The transformers backend requires a model path")
+            self._embedder = TransformersEmbedder(
+                self.model_path, pooling=self.pooling, num_threads=self.num_threads
+            )
+        else:
+            raise ValueError(f"Unknown local backend: {self.backend}")
+
+    def embed_batch(self, batch: List[str]) -> Tuple[Optional[List[List[float]]], float]:
+        start_time = time.time()
+        embeddings = self._embedder.encode(batch, self.max_length)
+        return embeddings.tolist(), time.time() - start_time
+
+    def get_embeddings(self, texts: List[str]) -> Tuple[np.ndarray, float]:
+        if not texts:
+            return np.array([]), 0.0
+
+        start_time = time.time()
+        lengths = self._embedder.count_tokens(texts, self.max_length)
+        batches = length_bucketed_batches(lengths, self.batch_size, self.max_batch_tokens)
+
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            futures = [
+                (batch, executor.submit(self._embedder.encode, [texts[i] for i in batch], self.max_length))
+                for batch in batches
+            ]
+            for batch, future in tqdm(futures, desc=f"Getting embeddings for {self.name}"):
+                try:
+                    embeddings = future.result()
+                except Exception as e:
+                    print(f"Error processing batch: {str(e)}")
+                    return np.array([]), time.time() - start_time
+                for index, embedding in zip(batch, embeddings):
+                    results[index] = embedding
+
+        return np.stack(results), time.time() - start_time
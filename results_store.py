@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    split TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    config TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup
+    ON runs (model, dataset, split, config_hash, timestamp);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs (timestamp);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    system TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, system, metric)
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_system ON metrics (system, metric, run_id);
+
+CREATE TABLE IF NOT EXISTS timings (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    key TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (id)
+);
+"""
+
+
+def config_hash(config: Dict) -> str:
+    """Stable short hash of a run configuration; empty when none was recorded."""
+    if not config:
+        return ""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ResultsStore:
+    """Append-only SQLite store of benchmark runs.
+
+    Every metrics key of a run is kept as its own ``system`` (e.g.
+    ``BAAI/bge-m3`` and ``BAAI/bge-m3_BAAI/bge-reranker-v2-m3``), so reranker
+    results are stored alongside the embedding model they were run on.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_run(
+        self,
+        results: Dict,
+        model: str,
+        dataset: str = "",
+        split: str = "",
+        config: Optional[Dict] = None,
+        timestamp: Optional[float] = None,
+        source: Optional[str] = None,
+    ) -> int:
+        """Append a ``{"metrics": ..., "timing": ...}`` result and return its run id.
+
+        If ``source`` is an existing JSON file it is recorded as ingested, so
+        ``ingest_json_dir`` does not import the same run a second time.
+        """
+        config = config or {}
+        timestamp = time.time() if timestamp is None else timestamp
+        source_path = Path(source).resolve() if source else None
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (model, dataset, split, config_hash, config, timestamp, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    model,
+                    dataset,
+                    split,
+                    config_hash(config),
+                    json.dumps(config, sort_keys=True, default=str),
+                    timestamp,
+                    str(source_path) if source_path else None,
+                ),
+            )
+            run_id = cursor.lastrowid
+
+            self.conn.executemany(
+                "INSERT INTO metrics (run_id, system, metric, value) VALUES (?, ?, ?, ?)",
+                [
+                    (run_id, system, metric, value)
+                    for system, system_metrics in results.get("metrics", {}).items()
+                    for metric, value in system_metrics.items()
+                ],
+            )
+            self.conn.executemany(
+                "INSERT INTO timings (run_id, key, value) VALUES (?, ?, ?)",
+                [(run_id, key, value) for key, value in results.get("timing", {}).items()],
+            )
+
+            if source_path is not None and source_path.is_file():
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO ingested_files (path, mtime, run_id) VALUES (?, ?, ?)",
+                    (str(source_path), source_path.stat().st_mtime, run_id),
+                )
+
+        return run_id
+
+    def ingest_json_dir(self, results_dir: str, pattern: str = "benchmark_results*.json") -> int:
+        """Import JSON result files not seen before (or modified since); return the count.
+
+        A modified file is imported as a new run; earlier runs are never removed.
+        """
+        ingested = 0
+        for json_file in sorted(Path(results_dir).glob(pattern)):
+            path = str(json_file.resolve())
+            mtime = json_file.stat().st_mtime
+
+            row = self.conn.execute(
+                "SELECT mtime FROM ingested_files WHERE path = ?", (path,)
+            ).fetchone()
+            if row is not None and row[0] >= mtime:
+                continue
+
+            try:
+                with open(json_file) as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Skipping {json_file}: {str(e)}")
+                continue
+
+            if not data.get("metrics"):
+                continue
+
+            # Legacy files do not record the model; files with several systems get the file stem
+            systems = list(data["metrics"])
+            model = systems[0] if len(systems) == 1 else json_file.stem
+            self.add_run(data, model=model, timestamp=mtime, source=path)
+            ingested += 1
+
+        return ingested
+
+    def _latest_runs_query(self, select: str) -> str:
+        # Latest run id for each (system, dataset, split, config_hash), so every
+        # value in a row comes from one run and differing setups are never mixed
+        return f"""
+            WITH latest AS (
+                SELECT system, dataset, split, config_hash, run_id FROM (
+                    SELECT m.system, r.dataset, r.split, r.config_hash, r.id AS run_id,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY m.system, r.dataset, r.split, r.config_hash
+                               ORDER BY r.timestamp DESC, r.id DESC
+                           ) AS rn
+                    FROM (SELECT DISTINCT run_id, system FROM metrics) m
+                    JOIN runs r ON r.id = m.run_id
+                    WHERE (:dataset IS NULL OR r.dataset = :dataset)
+                      AND (:split IS NULL OR r.split = :split)
+                      AND (:config_hash IS NULL OR r.config_hash = :config_hash)
+                )
+                WHERE rn = 1
+            )
+            {select}
+        """
+
+    def latest_metrics(
+        self,
+        dataset: Optional[str] = None,
+        split: Optional[str] = None,
+        config_hash: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Metrics of the most recent run of each system, per dataset, split and config."""
+        query = self._latest_runs_query(
+            """
+            SELECT l.system, l.dataset, l.split, l.config_hash, m.metric, m.value
+            FROM latest l JOIN metrics m ON m.run_id = l.run_id AND m.system = l.system
+            """
+        )
+        df = pd.read_sql_query(query, self.conn, params={"dataset": dataset, "split": split, "config_hash": config_hash})
+        if df.empty:
+            return pd.DataFrame()
+        table = df.pivot(index=["system", "dataset", "split", "config_hash"], columns="metric", values="value")
+        table.index = table.index.set_names(["model", "dataset", "split", "config_hash"])
+        table.columns.name = None
+        return table
+
+    def latest_timings(
+        self,
+        dataset: Optional[str] = None,
+        split: Optional[str] = None,
+        config_hash: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """``<system>_<kind>_time`` values from the runs used by ``latest_metrics``."""
+        query = self._latest_runs_query(
+            """
+            SELECT l.system, l.dataset, l.split, l.config_hash,
+                   substr(t.key, length(l.system) + 2) AS kind, t.value
+            FROM latest l JOIN timings t ON t.run_id = l.run_id
+            WHERE substr(t.key, 1, length(l.system) + 1) = l.system || '_'
+            """
+        )
+        df = pd.read_sql_query(query, self.conn, params={"dataset": dataset, "split": split, "config_hash": config_hash})
+
+        # "BAAI/bge-m3_BAAI/bge-reranker-v2-m3_rerank_time" must not count as a
+        # "BAAI/bge-m3" timing, so the remainder has to be a bare "<kind>_time"
+        df = df[df["kind"].str.fullmatch(r"[^_]+_time")]
+        if df.empty:
+            return pd.DataFrame()
+        table = df.pivot(index=["system", "dataset", "split", "config_hash"], columns="kind", values="value")
+        table.index = table.index.set_names(["model", "dataset", "split", "config_hash"])
+        table.columns.name = None
+        return table
+
+    def metric_trend(self, metric: str, system: Optional[str] = None) -> pd.DataFrame:
+        """History of ``metric`` over time, one column per system, dataset, split and config."""
+        query = """
+            SELECT r.timestamp, m.system, r.dataset, r.split, r.config_hash, m.value
+            FROM metrics m JOIN runs r ON r.id = m.run_id
+            WHERE m.metric = :metric AND (:system IS NULL OR m.system = :system)
+            ORDER BY r.timestamp
+        """
+        df = pd.read_sql_query(query, self.conn, params={"metric": metric, "system": system})
+        if df.empty:
+            return pd.DataFrame()
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+        return df.pivot_table(
+            index="timestamp",
+            columns=["system", "dataset", "split", "config_hash"],
+            values="value",
+            aggfunc="last",
+        )
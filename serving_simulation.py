@@ -0,0 +1,230 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+@dataclass
+class Reranker:
+    name: str
+    endpoint: str
+    api_key: str
+    top_n: int = 20
+
+    def rerank(self, query: str, documents: List[str]) -> List[float]:
+        """Score ``documents`` against ``query`` via a /rerank style endpoint."""
+        response = requests.post(
+            self.endpoint,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={
+                "model": self.name,
+                "query": query,
+                "documents": documents,
+            },
+        )
+        if response.status_code != 200:
+            raise Exception(f"Rerank call failed: {response.text}")
+
+        scores = [0.0] * len(documents)
+        for item in response.json()["results"]:
+            scores[item["index"]] = item["relevance_score"]
+        return scores
+
+
+@dataclass
+class _PendingQuery:
+    query_id: str
+    text: str
+    arrival_time: float
+    dispatch_time: float = 0.0
+    completion_time: float = 0.0
+
+
+def generate_arrival_offsets(
+    num_queries: int, rate: float, process: str = "poisson", seed: int = 0
+) -> np.ndarray:
+    """Return arrival times (seconds from start) for ``num_queries`` requests."""
+    if rate <= 0:
+        raise ValueError("Arrival rate must be positive")
+    if num_queries <= 0:
+        return np.array([])
+
+    if process == "constant":
+        gaps = np.full(num_queries, 1.0 / rate)
+    elif process == "poisson":
+        rng = np.random.default_rng(seed)
+        gaps = rng.exponential(1.0 / rate, size=num_queries)
+    else:
+        raise ValueError(f"Unknown arrival process: {process}")
+
+    # The first query arrives immediately
+    gaps[0] = 0.0
+    return np.cumsum(gaps)
+
+
+class ServingSimulator:
+    """Replay queries at a fixed arrival rate through embed -> search -> rerank.
+
+    A single scheduler thread forms micro-batches: it waits for the first
+    pending query, then keeps collecting until either ``max_batch_size``
+    queries are queued or ``max_wait_ms`` has passed since that first arrival.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        doc_ids: List[str],
+        doc_texts: List[str],
+        doc_embeddings: np.ndarray,
+        top_k: int = 100,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        reranker: Optional[Reranker] = None,
+    ):
+        self.embedding_model = embedding_model
+        self.doc_ids = doc_ids
+        self.doc_texts = doc_texts
+        self.doc_embeddings = doc_embeddings
+        self.top_k = top_k
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.reranker = reranker
+
+    def _collect_batch(self, pending: "queue.Queue") -> Optional[List[_PendingQuery]]:
+        first = pending.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = first.arrival_time + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Queries already waiting are always taken, even past the deadline
+                if remaining <= 0:
+                    item = pending.get_nowait()
+                else:
+                    item = pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Flush what we have, then let the scheduler see the sentinel
+                pending.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _process_batch(self, batch: List[_PendingQuery]) -> bool:
+        """Run embed -> search -> rerank for ``batch``; only the timing is kept."""
+        embeddings, _ = self.embedding_model.embed_batch([q.text for q in batch])
+        if embeddings is None:
+            return False
+
+        query_embeddings = np.array(embeddings)
+        if len(query_embeddings.shape) == 3:
+            query_embeddings = query_embeddings.reshape(query_embeddings.shape[0], -1)
+
+        similarities = cosine_similarity(query_embeddings, self.doc_embeddings)
+
+        for query, scores in zip(batch, similarities):
+            top_indices = np.argsort(scores)[-self.top_k:][::-1]
+            if self.reranker is not None:
+                self.reranker.rerank(
+                    query.text,
+                    [self.doc_texts[idx] for idx in top_indices[: self.reranker.top_n]],
+                )
+        return True
+
+    def _scheduler(self, pending: "queue.Queue", completed: List, batch_sizes: List):
+        while True:
+            batch = self._collect_batch(pending)
+            if batch is None:
+                return
+
+            dispatch_time = time.perf_counter()
+            try:
+                succeeded = self._process_batch(batch)
+            except Exception as e:
+                print(f"Error processing serving batch: {str(e)}")
+                succeeded = False
+            completion_time = time.perf_counter()
+
+            batch_sizes.append(len(batch))
+            if not succeeded:
+                continue
+            for query in batch:
+                query.dispatch_time = dispatch_time
+                query.completion_time = completion_time
+                completed.append(query)
+
+    def simulate(
+        self,
+        queries: List[Tuple[str, str]],
+        rate: float,
+        process: str = "poisson",
+        seed: int = 0,
+    ) -> Dict:
+        """Replay ``queries`` at ``rate`` queries/second and collect latency stats."""
+        offsets = generate_arrival_offsets(len(queries), rate, process, seed)
+        pending: "queue.Queue" = queue.Queue()
+        completed: List[_PendingQuery] = []
+        batch_sizes: List[int] = []
+
+        scheduler = threading.Thread(
+            target=self._scheduler, args=(pending, completed, batch_sizes)
+        )
+        scheduler.start()
+
+        start = time.perf_counter()
+        for (query_id, text), offset in zip(queries, offsets):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pending.put(_PendingQuery(query_id, text, time.perf_counter()))
+        pending.put(None)
+        scheduler.join()
+        end = time.perf_counter()
+
+        return self._summarize(completed, batch_sizes, len(queries), rate, process, end - start)
+
+    def _summarize(
+        self,
+        completed: List[_PendingQuery],
+        batch_sizes: List[int],
+        num_sent: int,
+        rate: float,
+        process: str,
+        wall_time: float,
+    ) -> Dict:
+        stats = {
+            "arrival_rate": rate,
+            "arrival_process": process,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queries_sent": num_sent,
+            "queries_completed": len(completed),
+            "throughput_qps": len(completed) / wall_time if wall_time > 0 else 0.0,
+            "mean_batch_size": float(np.mean(batch_sizes)) if batch_sizes else 0.0,
+        }
+        if not completed:
+            return stats
+
+        latencies = np.array([q.completion_time - q.arrival_time for q in completed]) * 1000.0
+        queue_waits = np.array([q.dispatch_time - q.arrival_time for q in completed]) * 1000.0
+        stats.update(
+            {
+                "latency_mean_ms": float(np.mean(latencies)),
+                "latency_p50_ms": float(np.percentile(latencies, 50)),
+                "latency_p90_ms": float(np.percentile(latencies, 90)),
+                "latency_p95_ms": float(np.percentile(latencies, 95)),
+                "latency_p99_ms": float(np.percentile(latencies, 99)),
+                "latency_max_ms": float(np.max(latencies)),
+                "queue_wait_mean_ms": float(np.mean(queue_waits)),
+            }
+        )
+        return stats